@@ -1,38 +1,95 @@
+import logging
+
 from simulator import Simulator
 
-from tango import AttrWriteType
+from tango import AttrWriteType, EnsureOmniThread
 from tango.server import Device, attribute, command, run
 
+log = logging.getLogger(__name__)
+
+# index of the attribute values in the tank state tuple
+STATE_LEVEL = 0
+STATE_FLOW = 1
+STATE_COLOR = 2
+STATE_VALVE = 3
+
+
+class TangoSimulator(Simulator):
+    """
+    Simulator whose thread is known to omniORB, so the listeners can push Tango events from it
+    """
+
+    def run(self) -> None:
+        # register the thread with omniORB once for its whole lifetime, not on every pushed event
+        with EnsureOmniThread():
+            super().run()
+
 
 class PaintTank(Device):
     """
     Tango device server implementation representing a single paint tank
     """
+    # simulator instance shared by all devices, assigned before the device server is started
+    simulator = None
+
     def init_device(self):
         super().init_device()
-        print("Initializing class %s for device %s" % (self.__class__.__name__, self.get_name()))
+        log.debug("Initializing class %s for device %s", self.__class__.__name__, self.get_name())
         # extract the tank name from the full device name, e.g. "epfl/station1/cyan" -> "cyan"
-        tank_name = self.get_name().split('/')[-1]
+        tank_name = self.get_name().rpartition('/')[2]
         # get a reference to the simulated tank
-        self.tank = simulator.get_paint_tank_by_name(tank_name)
+        self.tank = self.simulator.get_paint_tank_by_name(tank_name)
         if not self.tank:
             raise Exception(
                 "Error: Can't find matching paint tank in the simulator with given name = %s" % self.get_name())
+        # index of the tank in the station snapshot published by the simulator
+        self._index = self.simulator.get_tank_index(self.tank)
+        self._set_valve = self.tank.set_valve
+        # values are pushed as change events on every simulation step, instead of relying on client polling
+        self.set_change_event("level", True, False)
+        self.set_change_event("flow", True, False)
+        self.set_change_event("color", True, False)
+        self.set_change_event("valve", True, False)
+        self.simulator.add_listener(self._push_events)
+
+    def delete_device(self):
+        self.simulator.remove_listener(self._push_events)
+        super().delete_device()
 
-    @attribute(dtype=float)
-    def level(self):
+    def _push_events(self):
+        """
+        push the current tank state to the subscribed clients, called by the simulator after each step
+        and after a change made through this device
+        """
+        state = self.simulator.snapshot[self._index]
+        # called from the simulator thread, which TangoSimulator has registered with omniORB
+        self.push_change_event("level", state[STATE_LEVEL])
+        self.push_change_event("flow", state[STATE_FLOW])
+        self.push_change_event("color", state[STATE_COLOR])
+        self.push_change_event("valve", state[STATE_VALVE])
+
+    def _state(self, index):
+        """
+        get an attribute value from the station snapshot shared by all devices
+        """
+        return self.simulator.snapshot[self._index][index]
+
+    level = attribute(label="level", dtype=float, fget="get_level")
+
+    def get_level(self):
         """
         get level attribute
         range: 0 to 1
         """
-        return self.tank.get_level()
+        return self._state(STATE_LEVEL)
 
-    @attribute(dtype=float)
-    def flow(self):
+    flow = attribute(label="flow", dtype=float, fget="get_flow")
+
+    def get_flow(self):
         """
         get flow attribute
         """
-        return self.tank.get_outflow()
+        return self._state(STATE_FLOW)
 
     valve = attribute(label="valve", dtype=float,
                       access=AttrWriteType.READ_WRITE,
@@ -42,44 +99,57 @@ class PaintTank(Device):
     def set_valve(self, ratio):
         """
         set valve attribute
-        :param ratio: 0 to 1
+        :param ratio: 0 to 1, out-of-range writes are rejected by Tango (min_value/max_value)
         """
-        self.tank.set_valve(min(1, max(0, ratio)))
+        # change the tank and publish its state atomically with respect to the simulation step
+        with self.simulator.lock:
+            self._set_valve(ratio)
+            self.simulator.update_snapshot()
+        # let subscribed clients see the change now instead of after the next simulation step
+        self._push_events()
 
     def get_valve(self):
         """
         get valve attribute (range: 0 to 1)
         """
-        return self.tank.get_valve()
+        return self._state(STATE_VALVE)
+
+    color = attribute(label="color", dtype=str, fget="get_color")
 
-    @attribute(dtype=str)
-    def color(self):
+    def get_color(self):
         """
         get color attribute (hex string)
         """
-        return self.tank.get_color_rgb()  # grey
+        return self._state(STATE_COLOR)
 
     @command(dtype_out=float)
     def Fill(self):
         """
         command to fill up the tank with paint
         """
-        self.tank.fill()
-        return self.tank.get_level()
+        with self.simulator.lock:
+            level = self.tank.fill()
+            self.simulator.update_snapshot()
+        self._push_events()
+        return level
 
     @command(dtype_out=float)
     def Flush(self):
         """
         command to flush all paint
         """
-        self.tank.flush()
-        return self.tank.get_level()
+        with self.simulator.lock:
+            level = self.tank.flush()
+            self.simulator.update_snapshot()
+        self._push_events()
+        return level
 
 
 if __name__ == "__main__":
     # start the simulator as a background thread
-    simulator = Simulator()
+    simulator = TangoSimulator()
     simulator.start()
+    PaintTank.simulator = simulator
 
     # start the Tango device server (blocking call)
     run((PaintTank,))
@@ -1,11 +1,14 @@
-import sys
-import time
-import signal
+import logging
+from collections import deque
+from functools import lru_cache, partial
+from threading import Lock
 
 from PyQt5.QtWidgets import *
 from PyQt5.QtCore import *
-from PyQt5.QtGui import QPainter, QColor, QPen, QPalette
-from tango import AttributeProxy, DeviceProxy
+from PyQt5.QtGui import QPainter, QColor, QPen, QPalette, QPixmap, QRegion
+from tango import DeviceProxy, DevFailed, EventType, Group
+
+log = logging.getLogger(__name__)
 
 # prefix for all Tango device names
 TANGO_NAME_PREFIX = "epfl/station"
@@ -22,6 +25,28 @@ TANGO_COMMAND_FLUSH = "Flush"
 NB_STATION = 6
 NB_PAGE = 2
 
+# style sheet of the main window, parsed once for all widgets with the given object names
+APP_QSS = """
+QPushButton#stationButton { border: 2px solid; border-color: #505050; background-color: #87CEEB; }
+QLabel#stationTitle { border: 2px solid; border-color: #8682B4; background-color: #87CEEB; }
+QLabel#alarmTitle { border: 3px solid; border-color: #DC143C; background-color: #DC143C; }
+QLabel#eventTitle { border: 3px solid; border-color: #808080; background-color: #798081; }
+QFrame#separator { border: 3px solid; border-color: black; }
+"""
+
+# style sheets of the Fill/Flush buttons
+STYLE_OK = "border : 4px solid green; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light grey;"
+STYLE_ALARM = "border : 4px solid red; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light red;"
+
+
+@lru_cache(maxsize=256)
+def get_qcolor(color):
+    """
+    get the QColor for the given color name, shared by all widgets showing the same color
+    :param color: color in hex format (e.g. #000000)
+    """
+    return QColor(color)
+
 
 class TankWidget(QWidget):
     """
@@ -29,105 +54,188 @@ class TankWidget(QWidget):
     """
     MARGIN_BOTTOM = 30
     VALVE_WIDTH = 15
+    # painter resources shared by all tank widgets
+    PEN_OUTLINE = QPen(Qt.black, 2, Qt.SolidLine)
+    PEN_TRANSPARENT = QPen(QColor(0, 0, 0, 0))
 
     def __init__(self, tank_width, tank_height, level=0, valve=True):
         super().__init__()
-        self.fill_color = QColor("grey")
+        self.fill_color = get_qcolor("grey")
+        self._color_name = "grey"
         self.fill_level = level
         self.tank_height = tank_height
         self.tank_width = tank_width
         self.valve = 0
         self.flow = 0
         self.valve_text = valve
+        # label texts, formatted when the values change instead of on every repaint
+        self._valve_str = "0%"
+        self._flow_str = "0.0 l/s"
+        # pre-rendered tank outline and valve symbol, re-created when the widget is resized
+        self._background = None
+        # areas of the widget that can be repainted independently, updated when the widget is resized
+        self._tank_rect = QRect()
+        self._valve_label_rect = QRect()
+        self._flow_label_rect = QRect()
+        self._fill_width = 0
+        self._fill_height = 0
         self.setMinimumSize(self.tank_width, self.tank_height + self.MARGIN_BOTTOM)
 
-    def setValve(self, valve):
+    def fillTop(self, level):
         """
-        set the valve level between 0 and 100
+        get the y coordinate of the paint surface for the given fill level
         """
-        self.valve = valve
+        return 2 + int((1.0 - level) * self._fill_height)
 
-    def setFlow(self, flow):
+    def setState(self, level=None, valve=None, flow=None, color=None):
         """
-        set the value of the flow label
+        set the given values and repaint the affected areas at once, values that are None are left unchanged
+        :param level: fill level of the tank, range: 0-1
+        :param valve: valve level between 0 and 100
+        :param flow: value of the flow label
+        :param color: color of the paint in hex format (e.g. #000000)
         """
-        self.flow = flow
-
-    def setColor(self, color):
+        dirty = QRegion()
+        if level is not None:
+            old_top = self.fillTop(self.fill_level)
+            new_top = self.fillTop(level)
+            self.fill_level = level
+            if new_top != old_top:
+                # only the band between the old and the new paint surface changes
+                dirty = dirty.united(QRect(2, min(old_top, new_top), self._fill_width, abs(new_top - old_top)))
+        if color is not None and color != self._color_name:
+            self._color_name = color
+            self.fill_color = get_qcolor(color)
+            dirty = dirty.united(self._tank_rect)
+        if valve is not None:
+            self.valve = valve
+            valve_str = "%u%%" % valve
+            if valve_str != self._valve_str:
+                self._valve_str = valve_str
+                dirty = dirty.united(self._valve_label_rect)
+        if flow is not None:
+            self.flow = flow
+            flow_str = "%.1f l/s" % flow
+            if flow_str != self._flow_str:
+                self._flow_str = flow_str
+                dirty = dirty.united(self._flow_label_rect)
+        if not dirty.isEmpty():
+            self.update(dirty)
+
+    def resizeEvent(self, event):
+        """
+        compute the widget areas and render the tank outline and valve symbol for the new widget size
+        """
+        super().resizeEvent(event)
+        w = self.width()
+        mb = self.MARGIN_BOTTOM
+        vw = self.VALVE_WIDTH
+        center = w // 2
+        valve_top = self.height() - mb
+        label_width = center - vw
+        self._tank_rect = QRect(0, 0, w, valve_top + 1)
+        self._valve_label_rect = QRect(0, valve_top, label_width, mb)
+        self._flow_label_rect = QRect(center + vw, valve_top, label_width, mb)
+        self._fill_width = w - 4
+        self._fill_height = valve_top - 4
+        self._render_background()
+
+    def _render_background(self):
         """
-        set the color of the paint in hex format (e.g. #000000)
+        render the tank outline and valve symbol at the resolution of the screen showing the widget
         """
-        self.fill_color = QColor(color)
+        w = self.width()
+        mb = self.MARGIN_BOTTOM
+        vw = self.VALVE_WIDTH
+        center = w // 2
+        valve_top = self.height() - mb
+        top = valve_top + 5
+        bottom = valve_top + mb - 5
+        # the pixmap has device pixels, the painter below still uses widget coordinates
+        dpr = self.devicePixelRatioF()
+        self._background = QPixmap(self.size() * dpr)
+        self._background.setDevicePixelRatio(dpr)
+        self._background.fill(Qt.transparent)
+        painter = QPainter(self._background)
+        painter.setPen(self.PEN_OUTLINE)
+        # tank outline
+        painter.drawRect(1, 1, w - 2, valve_top - 2)
+        # valve symbol
+        painter.drawLine(center, valve_top, center, top)
+        painter.drawLine(center, valve_top + mb, center, bottom)
+        painter.drawLine(center - vw, top, center + vw, bottom)
+        painter.drawLine(center - vw, bottom, center + vw, top)
+        painter.drawLine(center - vw, top, center + vw, top)
+        painter.drawLine(center - vw, bottom, center + vw, bottom)
+        painter.end()
 
     def paintEvent(self, event):
         """
         paint method called to draw the UI elements
         """
+        # only draw the parts intersecting the area requested by Qt
+        dirty = event.rect()
         # get a painter object
         painter = QPainter(self)
-        # draw tank outline as solid black line
-        painter.setPen(QPen(Qt.black, 2, Qt.SolidLine))
-        painter.drawRect(1, 1, self.width() - 2, self.height() - self.MARGIN_BOTTOM - 2)
-        # draw paint color
-        painter.setPen(QColor(0, 0, 0, 0))
-        painter.setBrush(self.fill_color)
-        painter.drawRect(2, 2 + int((1.0 - self.fill_level) * (self.height() - self.MARGIN_BOTTOM - 4)),
-                         self.width() - 4,
-                         int(self.fill_level * (self.height() - self.MARGIN_BOTTOM - 4)))
-        # draw valve symobl
-        painter.setPen(QPen(Qt.black, 2, Qt.SolidLine))
-        painter.drawLine(self.width() // 2, self.height() - self.MARGIN_BOTTOM, self.width() // 2,
-                         self.height() - self.MARGIN_BOTTOM + 5)
-        painter.drawLine(self.width() // 2, self.height(), self.width() // 2,
-                         self.height() - 5)
-        painter.drawLine(self.width() // 2 - self.VALVE_WIDTH, self.height() - self.MARGIN_BOTTOM + 5,
-                         self.width() // 2 + self.VALVE_WIDTH,
-                         self.height() - 5)
-        painter.drawLine(self.width() // 2 - self.VALVE_WIDTH, self.height() - 5, self.width() // 2 + self.VALVE_WIDTH,
-                         self.height() - self.MARGIN_BOTTOM + 5)
-        painter.drawLine(self.width() // 2 - self.VALVE_WIDTH, self.height() - self.MARGIN_BOTTOM + 5,
-                         self.width() // 2 + self.VALVE_WIDTH,
-                         self.height() - self.MARGIN_BOTTOM + 5)
-        painter.drawLine(self.width() // 2 - self.VALVE_WIDTH, self.height() - 5, self.width() // 2 + self.VALVE_WIDTH,
-                         self.height() - 5)
+        # draw tank outline and valve symbol, re-rendered if the widget was moved to a screen with another scaling
+        if self._background.devicePixelRatio() != self.devicePixelRatioF():
+            self._render_background()
+        dpr = self._background.devicePixelRatio()
+        # the source rectangle is given in device pixels of the pixmap
+        painter.drawPixmap(QRectF(dirty), self._background,
+                           QRectF(dirty.x() * dpr, dirty.y() * dpr, dirty.width() * dpr, dirty.height() * dpr))
+        if dirty.intersects(self._tank_rect):
+            # draw paint color
+            painter.setPen(self.PEN_TRANSPARENT)
+            painter.setBrush(self.fill_color)
+            top = self.fillTop(self.fill_level)
+            painter.drawRect(2, top, self._fill_width, self._fill_height + 2 - top)
         # draw labels
         if self.valve_text:
-            painter.drawText(
-                QRect(0, self.height() - self.MARGIN_BOTTOM, self.width() // 2 - self.VALVE_WIDTH, self.MARGIN_BOTTOM),
-                Qt.AlignCenter, "%u%%" % self.valve)
-            painter.drawText(
-                QRect(self.width() // 2 + self.VALVE_WIDTH, self.height() - self.MARGIN_BOTTOM,
-                    self.width() // 2 - self.VALVE_WIDTH, self.MARGIN_BOTTOM),
-                Qt.AlignCenter, "%.1f l/s" % self.flow)
+            painter.setPen(self.PEN_OUTLINE)
+            if dirty.intersects(self._valve_label_rect):
+                painter.drawText(self._valve_label_rect, Qt.AlignCenter, self._valve_str)
+            if dirty.intersects(self._flow_label_rect):
+                painter.drawText(self._flow_label_rect, Qt.AlignCenter, self._flow_str)
 
 
 class PaintTankWidget(QWidget):
     """
     Widget to hold a single paint tank, valve slider and command buttons
     """
+    # emitted when a command or valve change is sent to the device
+    commandSent = pyqtSignal()
 
-    def __init__(self, nbstation, name, width, height=100, fill_button=False, flush_button=False, valve_en=True,level_en=True):
+    def __init__(self, nbstation, name, width, height=100, fill_button=False, flush_button=False, valve_en=True,level_en=True,
+                 max_redraw_rate=20):
         super().__init__()
         self.name = name
         self.bFi = fill_button
         self.bFl = flush_button
         self.nbstat = TANGO_NAME_PREFIX+"%s" % nbstation
+        # current style sheets of the Fill/Flush buttons
+        self._fi_style = STYLE_OK
+        self._fl_style = STYLE_OK
+        # text of the level label, setText is skipped when it doesn't change
+        self._level_str = None
         self.setGeometry(0, 0, width, height)
         self.setMinimumSize(width, height)
+        # values received since the last redraw, applied at most max_redraw_rate times per second
+        self._pending = {}
+        self._redraw_timer = QTimer(self)
+        self._redraw_timer.setSingleShot(True)
+        self._redraw_timer.setInterval(int(1000 / max_redraw_rate))
+        self._redraw_timer.timeout.connect(self._apply_pending)
         self.layout = QVBoxLayout()
-        self.threadpool = QThreadPool()
-        self.worker = TangoBackgroundWorker(self.nbstat, self.name)
-        self.worker.level.done.connect(self.setLevel)
-        self.worker.flow.done.connect(self.setFlow)
-        self.worker.color.done.connect(self.setColor)
-        self.worker.valve.done.connect(self.setValve)
+        # Tango requests of all widgets share the application thread pool, sized in ColorMixingPlantWindow
+        self.threadpool = QThreadPool.globalInstance()
         
         
         if fill_button:
             self.buttonfi = QPushButton('Fill', self)
             self.buttonfi.setToolTip('Fill up the tank with paint')
             self.buttonfi.clicked.connect(self.on_fill)
-            self.buttonfi.setStyleSheet("border : 4px solid green; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light grey;")
+            self.buttonfi.setStyleSheet(STYLE_OK)
             self.layout.addWidget(self.buttonfi)
 
         # label for level
@@ -149,8 +257,15 @@ class PaintTankWidget(QWidget):
         self.slider.setValue(0)  # valve closed
         self.slider.setSingleStep(10)
         self.slider.setTickInterval(20)
-        self.timer_slider = None
         self.slider.valueChanged[int].connect(self.changedValue)
+        # slider value waiting to be written and the last value known to the device
+        self._pending_valve = None
+        self._sent_valve = 0
+        # single-shot timer limiting the valve writes to one every 200 ms while the slider moves
+        self._slider_timer = QTimer(self)
+        self._slider_timer.setSingleShot(True)
+        self._slider_timer.setInterval(200)
+        self._slider_timer.timeout.connect(self._flush_valve)
         self.layout.addWidget(self.slider)
         
         
@@ -159,77 +274,114 @@ class PaintTankWidget(QWidget):
             self.buttonfl = QPushButton('Flush', self)
             self.buttonfl.setToolTip('Flush the tank')
             self.buttonfl.clicked.connect(self.on_flush)
-            self.buttonfl.setStyleSheet("border : 4px solid green; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light grey;")
+            self.buttonfl.setStyleSheet(STYLE_OK)
             self.layout.addWidget(self.buttonfl)
 
         self.setLayout(self.layout)
 
-        # set the valve attribute to fully closed
-        worker = TangoWriteAttributeWorker(self.nbstat, self.name, TANGO_ATTRIBUTE_VALVE, self.slider.value() / 100.0)
-        self.threadpool.start(worker)
-        self.worker.start()
+        # the widgets shown for a tank are fixed, so select the level handlers once instead of on every update
+        self._level_handlers = []
+        if level_en:
+            self._level_handlers.append(self._show_level)
+        if flush_button:
+            self._level_handlers.append(self._show_flush_alarm)
+        if fill_button:
+            self._level_handlers.append(self._show_fill_alarm)
+
+        # the attribute values are received and the valve closed for the whole station at once,
+        # see ColorMixingPlantWindow._build_station()
         # update the UI element
-        self.tank.setValve(0)
+        self.tank.setState(valve=0)
 
-    def changedValue(self):
+    def changedValue(self, value):
         """
         callback when the value of the valve slider has changed
         """
-        if self.timer_slider is not None:
-            self.killTimer(self.timer_slider)
-        # start a time that fires after 200 ms
-        self.timer_slider = self.startTimer(200)
+        self._pending_valve = value
+        # the latest value is written when the timer fires after 200 ms
+        if not self._slider_timer.isActive():
+            self._slider_timer.start()
 
-    def timerEvent(self, event):
+    def _flush_valve(self):
         """
-        callback when the timer has fired
+        callback when the slider timer has fired
         """
-        self.killTimer(self.timer_slider)
-        self.timer_slider = None
-
+        value, self._pending_valve = self._pending_valve, None
+        if value is None or value == self._sent_valve:
+            return
+        self._sent_valve = value
         # set valve attribute
-        worker = TangoWriteAttributeWorker(self.nbstat, self.name, TANGO_ATTRIBUTE_VALVE, self.slider.value() / 100.0)
-        worker.signal.done.connect(self.setValve)
+        worker = TangoWriteAttributeWorker(self.nbstat, self.name, TANGO_ATTRIBUTE_VALVE, value / 100.0)
+        # queued: the worker emits from a pool thread and must not wait for the UI
+        worker.signal.done.connect(self.setValve, Qt.QueuedConnection)
         self.threadpool.start(worker)
+        self.commandSent.emit()
 
-    def setLevel(self, level):
+    def setValues(self, values):
         """
-        set the level of the paint tank, range: 0-1
+        set new attribute values, the latest value of each attribute is shown with the next redraw
+        :param values: dict of attribute name -> value
         """
-        self.tank.fill_level = level
-        self.label_level.setText("Level: %.1f %%" % (level * 100))
-        if level > 0.95 and self.bFl:
-            self.buttonfl.setStyleSheet("border : 4px solid red; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light red;")
-        else :
-            if self.bFl:
-                self.buttonfl.setStyleSheet("border : 4px solid green; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light grey;")
-        if level < 0.05 and self.bFi:
-            self.buttonfi.setStyleSheet("border : 4px solid red; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light red;")
-        else:
-            if self.bFi:
-                self.buttonfi.setStyleSheet("border : 4px solid green; border-top-left-radius : 30px ;border-bottom-left-radius : 30px ; background-color : light grey;")
-        self.tank.update()
+        self._pending.update(values)
+        if not self._redraw_timer.isActive():
+            self._redraw_timer.start()
 
     def setValve(self, valve):
         """
-        set the value of the valve label
+        set the value of the valve, range: 0-1
+        """
+        self.setValues({TANGO_ATTRIBUTE_VALVE: valve})
+
+    def _apply_pending(self):
+        """
+        callback when the redraw timer has fired, shows the latest received values with a single repaint
+        """
+        pending, self._pending = self._pending, {}
+        level = pending.get(TANGO_ATTRIBUTE_LEVEL)
+        if level is not None:
+            for handler in self._level_handlers:
+                handler(level)
+        valve = pending.get(TANGO_ATTRIBUTE_VALVE)
+        if valve is not None:
+            if not self._slider_timer.isActive() and not self.slider.isSliderDown():
+                # user is not currently changing the slider, the value from the device is not written back
+                self._sent_valve = int(valve*100)
+                self.slider.blockSignals(True)
+                self.slider.setValue(self._sent_valve)
+                self.slider.blockSignals(False)
+                valve = valve*100
+            else:
+                valve = None
+        self.tank.setState(level=level, valve=valve, flow=pending.get(TANGO_ATTRIBUTE_FLOW),
+                           color=pending.get(TANGO_ATTRIBUTE_COLOR))
+
+    def _show_level(self, level):
         """
-        if self.timer_slider is None and not self.slider.isSliderDown():
-            # user is not currently changing the slider
-            self.slider.setValue(int(valve*100))
-            self.tank.setValve(valve*100)
+        show the fill level in the level label
+        """
+        level_str = "Level: %.1f %%" % (level * 100)
+        if level_str != self._level_str:
+            self.label_level.setText(level_str)
+            self._level_str = level_str
 
-    def setFlow(self, flow):
+    def _show_flush_alarm(self, level):
         """
-        set the value of the flow label
+        highlight the "Flush" button when the tank is almost full
         """
-        self.tank.setFlow(flow)
+        # only touch the button style sheet when the alarm state changes, setStyleSheet re-polishes the widget
+        fl_style = STYLE_ALARM if level > 0.95 else STYLE_OK
+        if fl_style is not self._fl_style:
+            self.buttonfl.setStyleSheet(fl_style)
+            self._fl_style = fl_style
 
-    def setColor(self, color):
+    def _show_fill_alarm(self, level):
         """
-        set the color of the paint
+        highlight the "Fill" button when the tank is almost empty
         """
-        self.tank.setColor(color)
+        fi_style = STYLE_ALARM if level < 0.05 else STYLE_OK
+        if fi_style is not self._fi_style:
+            self.buttonfi.setStyleSheet(fi_style)
+            self._fi_style = fi_style
 
     def on_fill(self):
         """
@@ -237,6 +389,7 @@ class PaintTankWidget(QWidget):
         """
         worker = TangoRunCommandWorker(self.nbstat, self.name, TANGO_COMMAND_FILL)
         self.threadpool.start(worker)
+        self.commandSent.emit()
 
     def on_flush(self):
         """
@@ -244,6 +397,7 @@ class PaintTankWidget(QWidget):
         """
         worker = TangoRunCommandWorker(self.nbstat, self.name, TANGO_COMMAND_FLUSH)
         self.threadpool.start(worker)
+        self.commandSent.emit()
 
 class Color(QWidget):
 
@@ -255,6 +409,55 @@ class Color(QWidget):
         palette.setColor(QPalette.Window, QColor(color))
         self.setPalette(palette)
 
+
+class EventModel(QAbstractTableModel):
+    """
+    Table model holding the most recent events/alarms, older rows are dropped once maxlen rows are stored
+    """
+    COLUMNS = 4
+
+    def __init__(self, maxlen=30, parent=None):
+        super().__init__(parent)
+        self._rows = deque(maxlen=maxlen)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.COLUMNS
+
+    def data(self, index, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and index.isValid():
+            return self._rows[index.row()][index.column()]
+        return None
+
+    def append(self, row):
+        """
+        add a row at the end of the table
+        :param row: tuple with one value per column
+        """
+        if len(self._rows) == self._rows.maxlen:
+            self.beginRemoveRows(QModelIndex(), 0, 0)
+            self._rows.popleft()
+            self.endRemoveRows()
+        position = len(self._rows)
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.append(tuple(row))
+        self.endInsertRows()
+
+
+def create_table_view(model):
+    """
+    create a table view without headers showing the given model
+    """
+    view = QTableView()
+    view.setModel(model)
+    view.verticalHeader().hide()
+    view.horizontalHeader().hide()
+    view.horizontalHeader().setStretchLastSection(True)
+    return view
+
+
 class ColorMixingPlantWindow(QMainWindow):
     """
     main UI window
@@ -264,6 +467,10 @@ class ColorMixingPlantWindow(QMainWindow):
         super().__init__()
         self.setWindowTitle("Color Mixing Plant Simulator - EPFL CS-487")
         self.setMinimumSize(1500, 900)
+        # styles of the widgets repeated in the window, selected by object name
+        self.setStyleSheet(APP_QSS)
+        # Tango calls are I/O bound, a bounded shared pool avoids one pool per tank widget
+        QThreadPool.globalInstance().setMaxThreadCount(min(32, 4 * NB_STATION))
  #STATION PAGE
         # Create a vertical layout
         vbox = QVBoxLayout()
@@ -284,7 +491,7 @@ class ColorMixingPlantWindow(QMainWindow):
         self.button_action.setCheckable(True)
         self.button_action.setAutoExclusive(True)
         stationToolBar.addWidget(self.button_action)
-        self.button_action.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
+        self.button_action.setObjectName("stationButton")
         self.button_action.clicked.connect(self.switch_home)
 
 
@@ -293,79 +500,21 @@ class ColorMixingPlantWindow(QMainWindow):
         stationToolBar.addSeparator()        
         stationToolBar.addSeparator()
 
-		#button : toolButton_1
-        self.toolButton_1 = QPushButton()
-        self.toolButton_1.setText("Station 1 ")
-        self.toolButton_1.setCheckable(True)
-        self.toolButton_1.setAutoExclusive(True)
-        self.toolButton_1.clicked.connect(self.switch_station1)
-        stationToolBar.addWidget(self.toolButton_1)
-        self.toolButton_1.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
-
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-
-		#button : toolButton_2
-        self.toolButton_2 = QPushButton()
-        self.toolButton_2.setText("Station 2 ")
-        self.toolButton_2.setCheckable(True)
-        self.toolButton_2.setAutoExclusive(True)
-        self.toolButton_2.clicked.connect(self.switch_station2)
-        stationToolBar.addWidget(self.toolButton_2)
-        self.toolButton_2.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
-
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-
-		#button : toolButton_3
-        self.toolButton_3 = QPushButton()
-        self.toolButton_3.setText("Station 3 ")
-        self.toolButton_3.setCheckable(True)
-        self.toolButton_3.setAutoExclusive(True)
-        self.toolButton_3.clicked.connect(self.switch_station3)
-        stationToolBar.addWidget(self.toolButton_3)
-        self.toolButton_3.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
-
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-
-		#button : toolButton_4
-        self.toolButton_4 = QPushButton()
-        self.toolButton_4.setText("Station 4 ")
-        self.toolButton_4.setCheckable(True)
-        self.toolButton_4.setAutoExclusive(True)
-        self.toolButton_4.clicked.connect(self.switch_station4)
-        stationToolBar.addWidget(self.toolButton_4)
-        self.toolButton_4.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
-
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-
-		#button : toolButton_5
-        self.toolButton_5 = QPushButton()
-        self.toolButton_5.setText("Station 5 ")
-        self.toolButton_5.setCheckable(True)
-        self.toolButton_5.setAutoExclusive(True)
-        self.toolButton_5.clicked.connect(self.switch_station5)
-        stationToolBar.addWidget(self.toolButton_5)
-        self.toolButton_5.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
-
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-        stationToolBar.addSeparator()
-
-		#button : toolButton_6
-        self.toolButton_6 = QPushButton()
-        self.toolButton_6.setText("Station 6 ")
-        self.toolButton_6.setCheckable(True)
-        self.toolButton_6.setAutoExclusive(True)
-        self.toolButton_6.clicked.connect(self.switch_station6)
-        stationToolBar.addWidget(self.toolButton_6)
-        self.toolButton_6.setStyleSheet("border: 2px solid; border-color : #505050; background-color : #87CEEB;")
+		#buttons : one per station
+        self.toolButtons = []
+        for nbstation in range(1, NB_STATION+1):
+            if nbstation > 1:
+                stationToolBar.addSeparator()
+                stationToolBar.addSeparator()
+                stationToolBar.addSeparator()
+            button = QPushButton()
+            button.setObjectName("stationButton")
+            button.setText("Station %d " % nbstation)
+            button.setCheckable(True)
+            button.setAutoExclusive(True)
+            button.clicked.connect(partial(self._switch_station, nbstation))
+            stationToolBar.addWidget(button)
+            self.toolButtons.append(button)
 
 
 	# Central part
@@ -390,24 +539,15 @@ class ColorMixingPlantWindow(QMainWindow):
         self.nbstation = 0
         self.station_layout = QStackedLayout()
 
+        # the station pages are empty until the station is shown for the first time, see _build_station()
+        self.station_pages = []
+        self._built = [False] * NB_STATION
+        # one background worker per built station, receiving the values of all its tanks
+        self.station_workers = [None] * NB_STATION
         for nbstation in range(1, NB_STATION+1):
             widget = QWidget()
-
-            test = QVBoxLayout(widget)
-
-            hbox = QHBoxLayout()
-            hbox.addWidget(PaintTankWidget(nbstation, "cyan", height=200, width=150, fill_button=True))
-            hbox.addWidget(PaintTankWidget(nbstation, "magenta", width=150, fill_button=True))
-            hbox.addWidget(PaintTankWidget(nbstation, "yellow", width=150, fill_button=True))
-            hbox.addWidget(PaintTankWidget(nbstation, "black", width=150, fill_button=True))
-            hbox.addWidget(PaintTankWidget(nbstation, "white", width=150, fill_button=True))
-
-            test.addLayout(hbox)
-            hbox = QHBoxLayout()
-            hbox.addWidget(PaintTankWidget(nbstation, "mixer", width=600, flush_button=True))
-            hbox.addWidget(Color('red',width = 200))
-            test.addLayout(hbox)
             self.station_layout.addWidget(widget)
+            self.station_pages.append(widget)
 
         self.station_layout.setCurrentIndex(self.nbstation)
 
@@ -415,34 +555,15 @@ class ColorMixingPlantWindow(QMainWindow):
 	#Tables
 		#Alarm
         self.table_layout = QHBoxLayout()
-        self.table_layout_alarm = QHBoxLayout()
-        self.table_layout_event = QHBoxLayout()
         self.alarm_layout = QVBoxLayout()
         title_alarm = QLabel("Alarms")
         title_alarm.setAlignment(Qt.AlignCenter)
-        title_alarm.setStyleSheet("border: 3px solid; border-color : #DC143C; background-color : #DC143C;")
+        title_alarm.setObjectName("alarmTitle")
         self.alarm_layout.addWidget(title_alarm)
-        self.alarm_table = QTableWidget(30, 4)
+        self.alarm_model = EventModel(30, self)
+        self.alarm_table = create_table_view(self.alarm_model)
         self.alarm_layout.addWidget(self.alarm_table)
 
-
-        self.alarm_table.verticalHeader().hide()
-        self.alarm_table.horizontalHeader().hide()
-        self.alarm_table.horizontalHeader().setStretchLastSection(True)
-
-        self.alarm_layout_copy = QVBoxLayout()
-        title_alarm = QLabel("Alarms")
-        title_alarm.setAlignment(Qt.AlignCenter)
-        title_alarm.setStyleSheet("border: 3px solid; border-color : #DC143C; background-color : #DC143C;")
-        self.alarm_layout_copy.addWidget(title_alarm)
-        self.alarm_table = QTableWidget(30, 4)
-        self.alarm_layout_copy.addWidget(self.alarm_table)
-
-
-        self.alarm_table.verticalHeader().hide()
-        self.alarm_table.horizontalHeader().hide()
-        self.alarm_table.horizontalHeader().setStretchLastSection(True)
-
 		#Events
 			#filter
         self.filter = QComboBox(self)
@@ -455,7 +576,7 @@ class ColorMixingPlantWindow(QMainWindow):
         self.line_edit_filter.setAlignment(Qt.AlignCenter)
         self.line_edit_filter.setReadOnly(True)
         self.line_edit_filter.setStyleSheet("border: 1px solid; border-color : #808080; background-color : white;")
-        #self.filter.activated[str].connect(self.filter_change)
+        self.filter.activated[str].connect(self.filter_change)
         height_filter = 23
         width_filter = 150
         self.filter.setGeometry(0, 0, width_filter, height_filter)
@@ -467,34 +588,19 @@ class ColorMixingPlantWindow(QMainWindow):
         filter_layout = QHBoxLayout()
         title_alarm_event = QLabel("Events & Alarms")
         title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
+        title_alarm_event.setObjectName("eventTitle")
         filter_layout.addWidget(title_alarm_event)
         filter_layout.addWidget(self.filter)
         self.event_layout.addLayout(filter_layout)
-        self.event_table = QTableWidget(30, 4)
+        # the filter combobox selects the rows of the event table through a proxy model
+        self.event_model = EventModel(30, self)
+        self.event_filter = QSortFilterProxyModel(self)
+        self.event_filter.setSourceModel(self.event_model)
+        self.event_filter.setFilterKeyColumn(-1)
+        self.event_table = create_table_view(self.event_filter)
         self.event_layout.addWidget(self.event_table)
-        self.event_table.verticalHeader().hide()
-        self.event_table.horizontalHeader().hide()
-        self.event_table.horizontalHeader().setStretchLastSection(True)
-
-        self.event_layout_copy = QVBoxLayout()
-        filter_layout = QHBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        filter_layout.addWidget(title_alarm_event)
-        filter_layout.addWidget(self.filter)
-        self.event_layout_copy.addLayout(filter_layout)
-        self.event_table = QTableWidget(30, 4)
-        self.event_layout_copy.addWidget(self.event_table)
-        
-        self.event_table.verticalHeader().hide()
-        self.event_table.horizontalHeader().hide()
-        self.event_table.horizontalHeader().setStretchLastSection(True)
 
 		#Layout
-        self.table_layout_alarm.addLayout(self.alarm_layout_copy)
-        self.table_layout_event.addLayout(self.event_layout_copy)
         self.table_layout.addLayout(self.alarm_layout)
         self.table_layout.addLayout(self.event_layout)
 
@@ -506,206 +612,57 @@ class ColorMixingPlantWindow(QMainWindow):
         self.vbox_home = QVBoxLayout()
         hbox_1 = QHBoxLayout()
         hbox_2 = QHBoxLayout()
-        self.vbox_station_1 =QVBoxLayout()
-        self.vbox_station_2 =QVBoxLayout()
-        self.vbox_station_3 =QVBoxLayout()
-        self.vbox_station_4 =QVBoxLayout()
-        self.vbox_station_5 =QVBoxLayout()
-        self.vbox_station_6 =QVBoxLayout()
-
-        
-        #fill the box
-	
-		#Name station
-        title_home_station_1 = QLabel()
-        title_home_station_1.setText("Station 1")
-        title_home_station_1.setAlignment(Qt.AlignCenter)
-        title_home_station_1.setStyleSheet("border : 2px solid; border-color : #8682B4; background-color : #87CEEB;")
-
-        title_home_station_2 = QLabel()
-        title_home_station_2.setText("Station 2")
-        title_home_station_2.setAlignment(Qt.AlignCenter)
-        title_home_station_2.setStyleSheet("border : 2px solid; border-color : #8682B4; background-color : #87CEEB;")
-
-        title_home_station_3 = QLabel()
-        title_home_station_3.setText("Station 3")
-        title_home_station_3.setAlignment(Qt.AlignCenter)
-        title_home_station_3.setStyleSheet("border : 2px solid; border-color : #8682B4; background-color : #87CEEB;")
-
-        title_home_station_4 = QLabel()
-        title_home_station_4.setText("Station 4")
-        title_home_station_4.setAlignment(Qt.AlignCenter)
-        title_home_station_4.setStyleSheet("border : 2px solid; border-color : #8682B4; background-color : #87CEEB;")
-
-        title_home_station_5 = QLabel()
-        title_home_station_5.setText("Station 5")
-        title_home_station_5.setAlignment(Qt.AlignCenter)
-        title_home_station_5.setStyleSheet("border : 2px solid; border-color : #8682B4; background-color : #87CEEB;")
-
-
-        title_home_station_6 = QLabel()
-        title_home_station_6.setText("Station 6")
-        title_home_station_6.setAlignment(Qt.AlignCenter)
-        title_home_station_6.setStyleSheet("border : 2px solid; border-color : #8682B4; background-color : #87CEEB;")
+        self.vbox_home.addLayout(hbox_1)
+        hline = QFrame()
+        hline.setFrameShape(QFrame.HLine)
+        hline.setObjectName("separator")
+        self.vbox_home.addWidget(hline)
+        self.vbox_home.addLayout(hbox_2)
 
         height_station = 75
         width_station = 435
 
-        title_home_station_1.setGeometry(0, 0, width_station, height_station)
-        title_home_station_1.setMinimumSize(width_station, height_station)
-        title_home_station_1.setMaximumSize(width_station, height_station)
-
-        title_home_station_2.setGeometry(0, 0, width_station, height_station)
-        title_home_station_2.setMinimumSize(width_station, height_station)
-        title_home_station_2.setMaximumSize(width_station, height_station)
-
-        title_home_station_3.setGeometry(0, 0, width_station, height_station)
-        title_home_station_3.setMinimumSize(width_station, height_station)
-        title_home_station_3.setMaximumSize(width_station, height_station)
-
-        title_home_station_4.setGeometry(0, 0, width_station, height_station)
-        title_home_station_4.setMinimumSize(width_station, height_station)
-        title_home_station_4.setMaximumSize(width_station, height_station)
-
-        title_home_station_5.setGeometry(0, 0, width_station, height_station)
-        title_home_station_5.setMinimumSize(width_station, height_station)
-        title_home_station_5.setMaximumSize(width_station, height_station)
-
-        title_home_station_6.setGeometry(0, 0, width_station, height_station)
-        title_home_station_6.setMinimumSize(width_station, height_station)
-        title_home_station_6.setMaximumSize(width_station, height_station)
-
-		
-
-       
-
-		#Table events & alarms for station
-
-        event_layout_1 = QVBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms 1")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        event_layout_1.addWidget(title_alarm_event)
-        self.event_table_1 = QTableWidget(20, 4)
-        event_layout_1.addWidget(self.event_table_1)
-        
-        self.event_table_1.verticalHeader().hide()
-        self.event_table_1.horizontalHeader().hide()
-        self.event_table_1.horizontalHeader().setStretchLastSection(True)
-
-        event_layout_2 = QVBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms 2")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        event_layout_2.addWidget(title_alarm_event)
-        self.event_table_2 = QTableWidget(20, 4)
-        event_layout_2.addWidget(self.event_table_2)
-        
-        self.event_table_2.verticalHeader().hide()
-        self.event_table_2.horizontalHeader().hide()
-        self.event_table_2.horizontalHeader().setStretchLastSection(True)
-
-        event_layout_3 = QVBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms 3")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        event_layout_3.addWidget(title_alarm_event)
-        self.event_table_3 = QTableWidget(20, 4)
-        event_layout_3.addWidget(self.event_table_3)
-        
-        self.event_table_3.verticalHeader().hide()
-        self.event_table_3.horizontalHeader().hide()
-        self.event_table_3.horizontalHeader().setStretchLastSection(True)
-
-        event_layout_4 = QVBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms 4")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        event_layout_4.addWidget(title_alarm_event)
-        self.event_table_4 = QTableWidget(20, 4)
-        event_layout_4.addWidget(self.event_table_4)
-        
-        self.event_table_4.verticalHeader().hide()
-        self.event_table_4.horizontalHeader().hide()
-        self.event_table_4.horizontalHeader().setStretchLastSection(True)
-
-        event_layout_5 = QVBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms 5")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        event_layout_5.addWidget(title_alarm_event)
-        self.event_table_5 = QTableWidget(20, 4)
-        event_layout_5.addWidget(self.event_table_5)
-        
-        self.event_table_5.verticalHeader().hide()
-        self.event_table_5.horizontalHeader().hide()
-        self.event_table_5.horizontalHeader().setStretchLastSection(True)
-
-
-        event_layout_6 = QVBoxLayout()
-        title_alarm_event = QLabel("Events & Alarms 6")
-        title_alarm_event.setAlignment(Qt.AlignCenter)
-        title_alarm_event.setStyleSheet("border: 3px solid; border-color : #808080; background-color : #798081;")
-        event_layout_6.addWidget(title_alarm_event)
-        self.event_table_6 = QTableWidget(20, 4)
-        event_layout_6.addWidget(self.event_table_6)
-        
-        self.event_table_6.verticalHeader().hide()
-        self.event_table_6.horizontalHeader().hide()
-        self.event_table_6.horizontalHeader().setStretchLastSection(True)
-
-
-		#include widget in the vbox
-        self.vbox_station_1.addWidget(title_home_station_1)
-        self.vbox_station_2.addWidget(title_home_station_2)
-        self.vbox_station_3.addWidget(title_home_station_3)
-        self.vbox_station_4.addWidget(title_home_station_4)
-        self.vbox_station_5.addWidget(title_home_station_5)
-        self.vbox_station_6.addWidget(title_home_station_6)
-
-        
-        
-        self.vbox_station_1.addLayout(event_layout_1)
-        self.vbox_station_2.addLayout(event_layout_2)
-        self.vbox_station_3.addLayout(event_layout_3)
-        self.vbox_station_4.addLayout(event_layout_4)
-        self.vbox_station_5.addLayout(event_layout_5)
-        self.vbox_station_6.addLayout(event_layout_6)
-        
-#Include Box
-
-        hline = QFrame()
-        hline.setFrameShape(QFrame.HLine);
-        hline.setStyleSheet("border: 3px solid; border-color : black;")
-        vline1 = QFrame()
-        vline1.setFrameShape(QFrame.VLine);
-        vline1.setStyleSheet("border: 3px solid; border-color : black;")
-        vline2 = QFrame()
-        vline2.setFrameShape(QFrame.VLine);
-        vline2.setStyleSheet("border: 3px solid; border-color : black;")
-        vline3 = QFrame()
-        vline3.setFrameShape(QFrame.VLine);
-        vline3.setStyleSheet("border: 3px solid; border-color : black;")
-        vline4 = QFrame()
-        vline4.setFrameShape(QFrame.VLine);
-        vline4.setStyleSheet("border: 3px solid; border-color : black;")
-
-        self.vbox_home.addLayout(hbox_1)
-        self.vbox_home.addWidget(hline)
-        self.vbox_home.addLayout(hbox_2)
+        #fill the box : stations 1-3 in the first row, 4-6 in the second row
+        self.vbox_stations = []
+        self.event_models = []
+        self.event_tables = []
+        for nbstation in range(1, NB_STATION+1):
+            row = hbox_1 if nbstation <= NB_STATION // 2 else hbox_2
+            if row.count() > 0:
+                vline = QFrame()
+                vline.setFrameShape(QFrame.VLine)
+                vline.setObjectName("separator")
+                row.addWidget(vline)
+
+            #Name station
+            title_home_station = QLabel()
+            title_home_station.setText("Station %d" % nbstation)
+            title_home_station.setAlignment(Qt.AlignCenter)
+            title_home_station.setObjectName("stationTitle")
+            title_home_station.setGeometry(0, 0, width_station, height_station)
+            title_home_station.setMinimumSize(width_station, height_station)
+            title_home_station.setMaximumSize(width_station, height_station)
+
+            #Table events & alarms for station
+            event_layout = QVBoxLayout()
+            title_alarm_event = QLabel("Events & Alarms %d" % nbstation)
+            title_alarm_event.setAlignment(Qt.AlignCenter)
+            title_alarm_event.setObjectName("eventTitle")
+            event_layout.addWidget(title_alarm_event)
+            event_model = EventModel(20, self)
+            event_table = create_table_view(event_model)
+            event_layout.addWidget(event_table)
+
+            #include widget in the vbox
+            vbox_station = QVBoxLayout()
+            vbox_station.addWidget(title_home_station)
+            vbox_station.addLayout(event_layout)
+            row.addLayout(vbox_station)
+
+            self.vbox_stations.append(vbox_station)
+            self.event_models.append(event_model)
+            self.event_tables.append(event_table)
 
-        hbox_1.addLayout(self.vbox_station_1)
-        hbox_1.addWidget(vline1)
-        hbox_1.addLayout(self.vbox_station_2)
-        hbox_1.addWidget(vline2)
-        hbox_1.addLayout(self.vbox_station_3)
-
-        hbox_2.addLayout(self.vbox_station_4)
-        hbox_2.addWidget(vline3)
-        hbox_2.addLayout(self.vbox_station_5)
-        hbox_2.addWidget(vline4)
-        hbox_2.addLayout(self.vbox_station_6)
-	
 #PAGES
         vbox_page_alarm_event_table = QVBoxLayout()
         self.num_page = 0
@@ -725,10 +682,6 @@ class ColorMixingPlantWindow(QMainWindow):
                 vbox_page_alarm_event_table.addLayout(self.station_layout)
                 vbox_page_alarm_event_table.addLayout(self.table_layout)
                 test.addLayout(vbox_page_alarm_event_table)
-            if page == 2 :
-                test.addLayout(self.table_layout_alarm)
-            if page == 3 :
-                test.addLayout(self.table_layout_event)
             self.page_layout.addWidget(widget)
 
         self.page_layout.setCurrentIndex(self.num_page)
@@ -766,29 +719,63 @@ class ColorMixingPlantWindow(QMainWindow):
     
     
     
-    @pyqtSlot()
-    def switch_station1(self):
-        self.set_station(0)
-    
-    @pyqtSlot()
-    def switch_station2(self):
-        self.set_station(1)
+    def _build_station(self, nbstation):
+        """
+        create the paint tank widgets of the given station, numbered from 1
+        """
+        widget = self.station_pages[nbstation - 1]
 
-    @pyqtSlot()
-    def switch_station3(self):
-        self.set_station(2)
+        test = QVBoxLayout(widget)
+
+        tanks = [
+            PaintTankWidget(nbstation, "cyan", height=200, width=150, fill_button=True),
+            PaintTankWidget(nbstation, "magenta", width=150, fill_button=True),
+            PaintTankWidget(nbstation, "yellow", width=150, fill_button=True),
+            PaintTankWidget(nbstation, "black", width=150, fill_button=True),
+            PaintTankWidget(nbstation, "white", width=150, fill_button=True),
+        ]
+        mixer = PaintTankWidget(nbstation, "mixer", width=600, flush_button=True)
+
+        hbox = QHBoxLayout()
+        for tank in tanks:
+            hbox.addWidget(tank)
+        test.addLayout(hbox)
+        hbox = QHBoxLayout()
+        hbox.addWidget(mixer)
+        hbox.addWidget(Color('red',width = 200))
+        test.addLayout(hbox)
+
+        # a single worker receives the attribute values of all tanks of the station
+        tanks.append(mixer)
+        worker = TangoBackgroundWorker(TANGO_NAME_PREFIX + "%s" % nbstation, [tank.name for tank in tanks])
+        for tank in tanks:
+            # queued: values are emitted from the worker and Tango event threads and must not wait for the UI
+            worker.signals[tank.name].done.connect(tank.setValues, Qt.QueuedConnection)
+            tank.commandSent.connect(worker.wake)
+        worker.start()
+        self.station_workers[nbstation - 1] = worker
+        # set the valve attribute of all tanks of the station to fully closed
+        worker = TangoGroupWriteAttributeWorker(TANGO_NAME_PREFIX + "%s" % nbstation, [tank.name for tank in tanks],
+                                                TANGO_ATTRIBUTE_VALVE, 0.0)
+        QThreadPool.globalInstance().start(worker)
+        self._built[nbstation - 1] = True
+
+    def _switch_station(self, nbstation, checked=False):
+        """
+        show the page of the given station, numbered from 1
+        :param checked: state of the clicked button, ignored
+        """
+        if not self._built[nbstation - 1]:
+            self._build_station(nbstation)
+        self.set_station(nbstation - 1)
+
+    @pyqtSlot(str)
+    def filter_change(self, text):
+        """
+        show only the events matching the selected filter, "None" shows all events
+        """
+        self.event_filter.setFilterFixedString("" if text == "None" else text)
 
-    @pyqtSlot()
-    def switch_station4(self):
-        self.set_station(3)
-        
-    @pyqtSlot()
-    def switch_station5(self):
-        self.set_station(4)
-    
-    @pyqtSlot()
-    def switch_station6(self):
-        self.set_station(5)
     @pyqtSlot()
     def switch_home(self):
         self.num_page=0
@@ -796,6 +783,64 @@ class ColorMixingPlantWindow(QMainWindow):
         self.update_title()    
 
 
+# DeviceProxy instances by device name, see get_device_proxy()
+_device_proxies = {}
+_device_proxies_lock = Lock()
+_attribute_configs = {}
+# DevFailed reasons of a write with an attribute configuration the device server no longer matches
+STALE_ATTRIBUTE_CONFIG_REASONS = frozenset(("API_IncompatibleAttrDataType", "API_IncompatibleAttrArgumentType",
+                                            "API_AttrNotFound", "API_AttrNotWritable"))
+
+
+def get_device_proxy(device):
+    """
+    get the DeviceProxy for the given device name, proxies are created once and shared by all workers
+    :param device: full device name, e.g. "epfl/station1/cyan"
+    """
+    # lru_cache would let two worker threads asking for the same device at once both create a proxy
+    with _device_proxies_lock:
+        proxy = _device_proxies.get(device)
+        if proxy is None:
+            proxy = _device_proxies[device] = DeviceProxy(device)
+        return proxy
+
+
+def get_attribute_config(device, attribute):
+    """
+    get the configuration of the given attribute, writing with it spares fetching the configuration on every write
+    :param device: full device name, e.g. "epfl/station1/cyan"
+    :param attribute: attribute name
+    """
+    with _device_proxies_lock:
+        config = _attribute_configs.get((device, attribute))
+    if config is None:
+        # fetched outside the lock, a slow device server must not block the workers of the other devices
+        config = get_device_proxy(device).get_attribute_config(attribute)
+        with _device_proxies_lock:
+            _attribute_configs[(device, attribute)] = config
+    return config
+
+
+def forget_attribute_config(device, attribute):
+    """
+    drop the cached configuration of the given attribute, the next get_attribute_config() fetches it again
+    :param device: full device name, e.g. "epfl/station1/cyan"
+    :param attribute: attribute name
+    """
+    with _device_proxies_lock:
+        _attribute_configs.pop((device, attribute), None)
+
+
+def is_stale_attribute_config(error):
+    """
+    whether a failed write is caused by an outdated cached attribute configuration
+    :param error: exception raised by DeviceProxy.write_attribute
+    """
+    if isinstance(error, TypeError):
+        return True
+    return isinstance(error, DevFailed) and bool(error.args) and error.args[0].reason in STALE_ATTRIBUTE_CONFIG_REASONS
+
+
 class WorkerSignal(QObject):
     """
     Implementation of a QT signal
@@ -812,7 +857,9 @@ class TangoWriteAttributeWorker(QRunnable):
     def __init__(self, name, device, attribute, value):
         super().__init__()
         self.signal = WorkerSignal()
-        self.path = "%s/%s/%s" % (name, device, attribute)
+        self.device = "%s/%s" % (name, device)
+        self.attribute = attribute
+        self.path = "%s/%s" % (self.device, attribute)
         self.value = value
 
     @pyqtSlot()
@@ -820,17 +867,59 @@ class TangoWriteAttributeWorker(QRunnable):
         """
         main method of the worker
         """
-        print("setDeviceAttribute: %s = %f" % (self.path, self.value))
-        attr = AttributeProxy(self.path)
+        log.debug("setDeviceAttribute: %s = %f", self.path, self.value)
         try:
+            device = get_device_proxy(self.device)
             # write attribute
-            attr.write(self.value)
-            # read back attribute
-            data = attr.read()
-            # send callback signal to UI
-            self.signal.done.emit(data.value)
-        except Exception as e:
-            print("Failed to write to the Attribute: %s. Is the Device Server running?" % self.path)
+            try:
+                device.write_attribute(get_attribute_config(self.device, self.attribute), self.value)
+            except (TypeError, DevFailed) as e:
+                # the cached configuration may be outdated, e.g. after a restart of the device server
+                if not is_stale_attribute_config(e):
+                    raise
+                forget_attribute_config(self.device, self.attribute)
+                device.write_attribute(get_attribute_config(self.device, self.attribute), self.value)
+            # send callback signal to UI, the written value is what the device holds now
+            self.signal.done.emit(self.value)
+        except Exception:
+            log.exception("Failed to write to the Attribute: %s. Is the Device Server running?", self.path)
+
+
+class TangoGroupWriteAttributeWorker(QRunnable):
+    """
+    Worker class to write the same value to a Tango attribute of the given devices of a station in the background.
+    The Tango group sends the requests to all devices before waiting for the replies.
+    """
+
+    def __init__(self, name, devices, attribute, value):
+        """
+        :param name: station name, e.g. "epfl/station1"
+        :param devices: device names of the tanks, e.g. ["cyan", "mixer"]
+        :param attribute: name of the attribute
+        :param value: value written to every device
+        """
+        super().__init__()
+        self.name = name
+        self.devices = list(devices)
+        self.attribute = attribute
+        self.value = value
+
+    @pyqtSlot()
+    def run(self):
+        """
+        main method of the worker
+        """
+        log.debug("setGroupAttribute: %s/%s/%s = %f", self.name, self.devices, self.attribute, self.value)
+        try:
+            group = Group(self.name)
+            # explicit device names: a wildcard would match any device of the station registered in the database
+            group.add(["%s/%s" % (self.name, device) for device in self.devices])
+            for reply in group.write_attribute(self.attribute, self.value):
+                if reply.has_failed():
+                    log.warning("Failed to write to the Attribute: %s/%s", reply.dev_name(), self.attribute)
+        except Exception:
+            log.exception("Failed to write to the Attribute: %s/%s/%s. Is the Device Server running?",
+                          self.name, self.devices, self.attribute)
 
 
 class TangoRunCommandWorker(QRunnable):
@@ -857,78 +946,170 @@ class TangoRunCommandWorker(QRunnable):
         """
         main method of the worker
         """
-        print("device: %s command: %s args: %s" % (self.device, self.command, self.args))
+        log.debug("device: %s command: %s args: %s", self.device, self.command, self.args)
         try:
-            device = DeviceProxy(self.device)
+            device = get_device_proxy(self.device)
             # get device server method
             func = getattr(device, self.command)
             # call command
             result = func(*self.args)
             # send callback signal to UI
             self.signal.done.emit(result)
-        except Exception as e:
-            print("Error calling device server command: device: %s command: %s" % (self.device, self.command))
+        except Exception:
+            log.exception("Error calling device server command: device: %s command: %s", self.device, self.command)
 
 
-class TangoBackgroundWorker(QThread):
+class TangoBackgroundWorker(QObject):
     """
-    This worker runs in the background and polls certain Tango device attributes (e.g. level, flow, color).
+    This worker runs in its own thread and subscribes to change events of certain Tango device attributes
+    (e.g. level, flow, color) of all tanks of a station, or polls them if the device server doesn't support events.
     It will signal to the UI when new data is available.
+    Polling slows down while the values don't change and is reset to the fastest rate by wake().
     """
+    # emitted by wake(), delivered to the thread of the worker
+    _woken = pyqtSignal()
 
-    def __init__(self, name, device, interval =0.5):
+    def __init__(self, name, devices, interval =0.5, max_interval=5.0):
         """
         creates a new instance
         :param name: station name
-        :param device: device name
-        :param interval: polling interval in seconds
+        :param devices: device names of the tanks
+        :param interval: polling interval in seconds, if events are not available
+        :param max_interval: longest polling interval in seconds, reached while the values don't change
         """
         super().__init__()
         self.name = name
-        self.device= device
+        self.devices = list(devices)
         self.interval = interval
-        self.level = WorkerSignal()
-        self.flow = WorkerSignal()
-        self.color = WorkerSignal()
-        self.valve = WorkerSignal()
+        self.max_interval = max_interval
+        # last values read from each polled device
+        self._last = {}
+        self.attributes = [TANGO_ATTRIBUTE_COLOR, TANGO_ATTRIBUTE_LEVEL, TANGO_ATTRIBUTE_FLOW, TANGO_ATTRIBUTE_VALVE]
+        # one signal per device, emits a dict of attribute name -> value for all attributes received together
+        self.signals = {device: WorkerSignal() for device in self.devices}
+        # (device name, DeviceProxy) of the devices that need to be polled
+        self._polled = []
+        self._timer = None
+        # the worker lives in its own thread, its slots run in the event loop of that thread
+        self._thread = QThread()
+        self.moveToThread(self._thread)
+        self._thread.started.connect(self.run)
+        self._woken.connect(self._reset_interval)
+
+    def start(self):
+        """
+        start the thread of the worker
+        """
+        self._thread.start()
 
+    @pyqtSlot()
     def run(self):
         """
-        main method of the worker
+        main method of the worker, called once the thread has started
         """
-        print("Starting TangoBackgroundWorker for '%s' tank" % self.name)
-        # define attributes
-        try:
-            level = AttributeProxy("%s/%s/%s" % (self.name, self.device, TANGO_ATTRIBUTE_LEVEL))
-            flow = AttributeProxy("%s/%s/%s" % (self.name, self.device, TANGO_ATTRIBUTE_FLOW))
-            color = AttributeProxy("%s/%s/%s" % (self.name, self.device, TANGO_ATTRIBUTE_COLOR))
-            valve = AttributeProxy("%s/%s/%s" % (self.name, self.device, TANGO_ATTRIBUTE_VALVE))
-        except Exception as e:
-            print("Error creating AttributeProxy for %s" % self.device)
+        log.debug("Starting TangoBackgroundWorker for '%s'", self.name)
+        for device in self.devices:
+            try:
+                proxy = get_device_proxy("%s/%s" % (self.name, device))
+            except Exception:
+                log.exception("Error creating DeviceProxy for %s", device)
+                continue
+            if not self.subscribe(device, proxy):
+                self._polled.append((device, proxy))
+
+        if not self._polled:
+            # values are delivered by on_event() from now on, the event loop of the thread is not needed
+            self._thread.quit()
             return
 
-        while True:
+        # poll the attributes from a timer running in the event loop of this thread
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.PreciseTimer)
+        self._timer.setInterval(int(self.interval * 1000))
+        self._timer.timeout.connect(self.poll)
+        self._timer.start()
+        self.poll()
+
+    @pyqtSlot()
+    def poll(self):
+        """
+        read all attributes of the polled devices and signal the new values to the UI
+        """
+        # send the read requests of all devices first, so the devices answer in parallel
+        requests = []
+        for device, proxy in self._polled:
             try:
-                # read attributes
-                data_color = color.read()
-                data_level = level.read()
-                data_flow = flow.read()
-                data_valve = valve.read()
+                requests.append((device, proxy, proxy.read_attributes_asynch(self.attributes)))
+            except Exception as e:
+                log.warning("Error reading from the device %s: %s", device, e)
+        timeout = int(self.interval * 1000)
+        changed = False
+        for device, proxy, request in requests:
+            try:
+                # wait for the reply with all attributes of the device
+                data = proxy.read_attributes_reply(request, timeout)
+                values = {attribute: value.value for attribute, value in zip(self.attributes, data)}
+                changed = changed or values != self._last.get(device)
+                self._last[device] = values
                 # signal to UI
-                self.color.done.emit(data_color.value)
-                self.level.done.emit(data_level.value)
-                self.flow.done.emit(data_flow.value)
-                self.valve.done.emit(data_valve.value)
+                self.signals[device].done.emit(values)
             except Exception as e:
-                print("Error reading from the device: %s" % e)
+                log.warning("Error reading from the device %s: %s", device, e)
 
-            # wait for next round
-            time.sleep(self.interval)
+        # poll twice as slow while nothing changes, back at full rate as soon as something does
+        if changed:
+            self._reset_interval()
+        else:
+            self._timer.setInterval(min(self._timer.interval() * 2, int(self.max_interval * 1000)))
+
+    def wake(self):
+        """
+        poll at the fastest rate again, e.g. after a command was sent to a device, can be called from any thread
+        """
+        self._woken.emit()
+
+    @pyqtSlot()
+    def _reset_interval(self):
+        """
+        set the polling interval back to the fastest rate
+        """
+        if self._timer is not None:
+            self._timer.setInterval(int(self.interval * 1000))
+
+    def subscribe(self, device, proxy):
+        """
+        subscribe to change events of all attributes of the given device
+        :return: True if subscribed, False if the attributes need to be polled
+        """
+        event_ids = []
+        callback = partial(self.on_event, device)
+        try:
+            for attribute in self.attributes:
+                event_ids.append(proxy.subscribe_event(attribute, EventType.CHANGE_EVENT, callback))
+        except Exception as e:
+            log.info("Change events not available for %s/%s, polling instead: %s", self.name, device, e)
+            for event_id in event_ids:
+                proxy.unsubscribe_event(event_id)
+            return False
+        return True
+
+    def on_event(self, device, event):
+        """
+        callback for change events, called from a Tango thread
+        """
+        if event.err:
+            log.warning("Error event from the device: %s", event.errors)
+            return
+        self.signals[device].done.emit({event.attr_value.name: event.attr_value.value})
 
 
 if __name__ == '__main__':
+    import sys
+    import signal
+
     # register signal handler for CTRL-C events
     signal.signal(signal.SIGINT, signal.SIG_DFL)
+    logging.basicConfig(level=logging.WARNING)
 
     # init the QT application and the main window
     app = QApplication(sys.argv)
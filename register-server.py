@@ -18,16 +18,22 @@ except ConnectionFailed as e:
     sys.exit(0)
 
 # List of devices to register for each station
-device_names = ["cyan", "magenta", "yellow", "black", "white", "mixer"]
+device_names = ("cyan", "magenta", "yellow", "black", "white", "mixer")
 
 for station in args.stations:
+    # Define the instance name for the device server
+    server = f"PaintMixingStation/{station}"
+    device_infos = []
     for device_name in device_names:
         device_info = DbDevInfo()
         # Define the Tango Class served by this device server
         device_info._class = "PaintTank"
-        # Define the instance name for the device server
-        device_info.server = "PaintMixingStation/%s" % station
-        # Define the device name
-        device_info.name = "epfl/%s/%s" % (station, device_name)
-        db.add_device(device_info)
+        device_info.server = server
+        # Define the device name, epfl/<station>/<device>
+        device_info.name = f"epfl/{station}/{device_name}"
+        device_infos.append(device_info)
+    # Register all devices of the station in a single database request, including the
+    # dserver/<server> admin device that add_device() used to create and that the server needs to start
+    db.add_server(server, device_infos, with_dserver=True)
+    for device_info in device_infos:
         print("Added device: %s\tinstance: %s\tclass: %s" % (device_info.name, device_info.server, device_info._class))
@@ -1,9 +1,12 @@
-from dataclasses import dataclass
-from threading import Thread
+from functools import lru_cache
+import logging
+from threading import RLock, Thread
 import time
 
 import mixbox
 
+log = logging.getLogger(__name__)
+
 # constants
 TANK_VOLUME = 100  # liters
 TANK_OUTFLOW = 2  # liter / s
@@ -11,23 +14,45 @@ BASIN_VOLUME = 500  # liters
 BASIN_OUTFLOW = 5  # liter / s
 
 
-@dataclass
 class PaintMixture:
     """
     Represents a paint mixture consisting of several basic colors
+    Instances are never modified after creation, all operations return a new instance.
     """
-    cyan: int = 0
-    magenta: int = 0
-    yellow: int = 0
-    black: int = 0
-    white: int = 0
+    # no per-instance __dict__, mixtures are created several times per tank and time step
+    __slots__ = ('cyan', 'magenta', 'yellow', 'black', 'white', '_volume')
+
+    def __init__(self, cyan=0, magenta=0, yellow=0, black=0, white=0):
+        self.cyan = cyan
+        self.magenta = magenta
+        self.yellow = yellow
+        self.black = black
+        self.white = white
+        # total volume, computed once when the mixture is created
+        self._volume = cyan + magenta + yellow + black + white
+
+    def __repr__(self):
+        return "PaintMixture(cyan=%r, magenta=%r, yellow=%r, black=%r, white=%r)" % (
+            self.cyan, self.magenta, self.yellow, self.black, self.white)
+
+    def __eq__(self, b):
+        """
+        compare the volumes of all basic colors of two paint mixtures
+        """
+        if b.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.cyan == b.cyan and self.magenta == b.magenta and self.yellow == b.yellow and
+                self.black == b.black and self.white == b.white)
+
+    # mixtures compare by value like the former dataclass, they are not used as dict keys
+    __hash__ = None
 
     @property
     def volume(self):
         """
         get the volume of the paint mixture
         """
-        return self.cyan + self.magenta + self.yellow + self.black + self.white
+        return self._volume
 
     def __add__(self, b):
         """
@@ -57,6 +82,11 @@ class PaintMixture:
                             self.white * b)
 
 
+# shared empty paint mixture, safe to reuse because mixtures are never modified
+# volumes are floats like the results of the mixture arithmetic, also for tanks that are never stepped
+EMPTY_PAINT = PaintMixture(0.0, 0.0, 0.0, 0.0, 0.0)
+
+
 def CMYKToRGB(c, m, y, k):
     """
     convert from RGB to CMYK colors
@@ -74,18 +104,43 @@ YELLOW_RGB = CMYKToRGB(0, 0, 1, 0)
 BLACK_RGB = (0, 0, 0)
 WHITE_RGB = (255, 255, 255)
 
-# mixbox colors
-CYAN = mixbox.rgb_to_latent(CYAN_RGB)
-MAGENTA = mixbox.rgb_to_latent(MAGENTA_RGB)
-YELLOW = mixbox.rgb_to_latent(YELLOW_RGB)
-BLACK = mixbox.rgb_to_latent(BLACK_RGB)
-WHITE = mixbox.rgb_to_latent(WHITE_RGB)
+# mixbox colors, as tuples so the shared constants can't be modified
+CYAN = tuple(mixbox.rgb_to_latent(CYAN_RGB))
+MAGENTA = tuple(mixbox.rgb_to_latent(MAGENTA_RGB))
+YELLOW = tuple(mixbox.rgb_to_latent(YELLOW_RGB))
+BLACK = tuple(mixbox.rgb_to_latent(BLACK_RGB))
+WHITE = tuple(mixbox.rgb_to_latent(WHITE_RGB))
+
+# latent vectors of the basic colors as columns, in the order of the PaintMixture fields:
+# LATENT_COLUMNS[i] holds element i of the cyan, magenta, yellow, black and white latent vectors
+LATENT_COLUMNS = tuple(zip(CYAN, MAGENTA, YELLOW, BLACK, WHITE))
+
+
+@lru_cache(maxsize=1024)
+def mix_color(weights):
+    """
+    get the color of a paint mixture as (r, g, b) tuple and in hex format #rrggbb
+    the color only depends on the shares of the basic colors, so e.g. a draining single-color tank always hits the cache
+    :param weights: tuple with the share of cyan, magenta, yellow, black and white in the volume, summing up to 1
+    :return: tuple ((r, g, b), "#rrggbb")
+    """
+    # https://github.com/scrtwpns/mixbox/blob/master/python/mixbox.py
+    # the latent mix is the sum of the basic color latents weighted by their share of the volume
+    cyan, magenta, yellow, black, white = weights
+    z_mix = [cyan * z_cyan + magenta * z_magenta + yellow * z_yellow + black * z_black + white * z_white
+             for z_cyan, z_magenta, z_yellow, z_black, z_white in LATENT_COLUMNS]
+    r, g, b = mixbox.latent_to_rgb(z_mix)
+    return (r, g, b), "#%02x%02x%02x" % (r, g, b)
 
 
 class PaintTank:
     """
     Class represents a paint tank
     """
+    # no per-instance __dict__, the attributes of every tank are read on each time step
+    __slots__ = ('name', 'tank_volume', 'outflow_rate', 'initial_paint', 'connected_to', 'paint', 'valve_ratio',
+                 'outflow', '_color_cache')
+
     def __init__(self, name, volume, outflow_rate, paint: PaintMixture, connected_to=None):
         """
         Initializes the paint tank with the give parameters
@@ -102,7 +157,9 @@ class PaintTank:
         self.connected_to = connected_to
         self.paint = self.initial_paint
         self.valve_ratio = 0  # valve closed
-        self.outflow = 0
+        self.outflow = 0.0
+        # last paint mixture and its color as returned by mix_color(), the color is only recomputed when the mixture changes
+        self._color_cache = (None, None)
 
     def add(self, inflow):
         """
@@ -114,14 +171,18 @@ class PaintTank:
     def fill(self, level=1.0):
         """
         fill up the tank based on the specified initial paint mixture
+        :return: new fill level
         """
         self.paint = self.initial_paint * (level * self.tank_volume / self.initial_paint.volume)
+        return self.get_level()
 
     def flush(self):
         """
         flush the tank
+        :return: new fill level
         """
-        self.paint = PaintMixture()
+        self.paint = EMPTY_PAINT
+        return 0.0
 
     def get_level(self):
         """
@@ -149,25 +210,43 @@ class PaintTank:
         """
         return self.outflow
 
+    def _get_color(self):
+        """
+        get the color of the paint mixture as tuple ((r, g, b), "#rrggbb")
+        """
+        paint = self.paint
+        # read the cache once, it may be replaced concurrently
+        cached_paint, cached_color = self._color_cache
+        if paint == cached_paint:
+            return cached_color
+        volume = paint.volume
+        if volume == 0:
+            color = ((0, 0, 0), "#000000")
+        else:
+            color = mix_color((paint.cyan / volume, paint.magenta / volume, paint.yellow / volume,
+                               paint.black / volume, paint.white / volume))
+        # paint mixtures are never modified in place, so keeping a reference is safe
+        self._color_cache = (paint, color)
+        return color
+
     def get_color_rgb(self):
         """
         get the color of the paint mixture in hex format #rrggbb
         """
-        volume = self.paint.volume
-        if volume == 0:
-            return "#000000"
-        # https://github.com/scrtwpns/mixbox/blob/master/python/mixbox.py
-        z_mix = [0] * mixbox.LATENT_SIZE
-
-        for i in range(len(z_mix)):
-            z_mix[i] = (self.paint.cyan / volume * CYAN[i] +
-                        self.paint.magenta / volume * MAGENTA[i] +
-                        self.paint.yellow / volume * YELLOW[i] +
-                        self.paint.black / volume * BLACK[i] +
-                        self.paint.white / volume * WHITE[i]
-                        )
-        rgb = mixbox.latent_to_rgb(z_mix)
-        return "#%02x%02x%02x" % (rgb[0], rgb[1], rgb[2])
+        return self._get_color()[1]
+
+    def get_color_rgb_tuple(self):
+        """
+        get the color of the paint mixture as (r, g, b) tuple of ints in the range 0-255
+        """
+        return self._get_color()[0]
+
+    def get_state(self):
+        """
+        get the level, outflow, color and valve setting of the tank in a single call
+        :return: tuple (level, outflow, color, valve)
+        """
+        return self.get_level(), self.outflow, self.get_color_rgb(), self.valve_ratio
 
     def simulate_timestep(self, interval):
         """
@@ -175,26 +254,36 @@ class PaintTank:
         """
         # calculate the volume of the paint flowing out in the current time interval
         outgoing_volume = self.valve_ratio * self.outflow_rate * interval
-        if outgoing_volume >= self.paint.volume:
-            # tank will be empty within the current time interval
-            out = self.paint
-            self.paint = PaintMixture()  # empty
+        # volume of the paint in the tank, kept up to date below instead of summing the mixture again
+        volume = self.paint.volume
+        if outgoing_volume == 0:
+            # valve closed: nothing flows out, the tank only changes through its inflow
+            out = EMPTY_PAINT
+            self.outflow = 0.0
         else:
-            # tank will not be empty
-            out = self.paint * (outgoing_volume / self.paint.volume)
-            self.paint -= out
-
-        # set outgoing paint volume
-        self.outflow = out.volume
-
-        if self.connected_to is not None:
-            # add outgoing paint into the connected tank
-            self.connected_to.add(out)
+            if outgoing_volume >= volume:
+                # tank will be empty within the current time interval
+                out = self.paint
+                self.paint = EMPTY_PAINT
+                volume = 0
+            else:
+                # tank will not be empty
+                out = self.paint * (outgoing_volume / volume)
+                self.paint -= out
+                volume = self.paint.volume
+
+            # set outgoing paint volume
+            self.outflow = out.volume
+
+            connected_to = self.connected_to
+            if connected_to is not None:
+                # add outgoing paint into the connected tank, same as connected_to.add(out) without the extra call
+                connected_to.paint = connected_to.paint + out
 
         # check if tank has overflown
-        if self.paint.volume > self.tank_volume:
+        if volume > self.tank_volume:
             # keep it at the maximum fill level
-            self.paint *= self.tank_volume / self.paint.volume
+            self.paint *= self.tank_volume / volume
 
         # return outgoing paint mixture
         return out
@@ -205,45 +294,118 @@ class Simulator(Thread):
     simulation of a paint mixing plant
     """
 
-    def __init__(self):
+    def __init__(self, realtime=True):
+        """
+        :param realtime: if True, run() advances the simulation in step with the wall clock,
+                         otherwise it simulates as fast as possible
+        """
         Thread.__init__(self)
         self.stopRequested = False
+        self.realtime = realtime
         self.sim_time = 0
+        # held while the tanks are stepped or their state is read into the snapshot,
+        # code changing the tanks from other threads must hold it as well
+        self.lock = RLock()
 
         # set up the mixing tank, initially empty
-        self.mixer = PaintTank("mixer", BASIN_VOLUME, BASIN_OUTFLOW, PaintMixture())
+        self.mixer = PaintTank("mixer", BASIN_VOLUME, BASIN_OUTFLOW, EMPTY_PAINT)
 
         # set up the paint storage tanks and connect them to the mixing tank
         self.tanks = [
-            PaintTank("cyan", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(TANK_VOLUME, 0, 0, 0, 0),
+            PaintTank("cyan", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(float(TANK_VOLUME), 0.0, 0.0, 0.0, 0.0),
                       connected_to=self.mixer),  # cyan
-            PaintTank("magenta", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0, TANK_VOLUME, 0, 0, 0),
+            PaintTank("magenta", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0.0, float(TANK_VOLUME), 0.0, 0.0, 0.0),
                       connected_to=self.mixer),  # magenta
-            PaintTank("yellow", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0, 0, TANK_VOLUME, 0, 0),
+            PaintTank("yellow", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0.0, 0.0, float(TANK_VOLUME), 0.0, 0.0),
                       connected_to=self.mixer),  # yellow
-            PaintTank("black", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0, 0, 0, TANK_VOLUME, 0),
+            PaintTank("black", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0.0, 0.0, 0.0, float(TANK_VOLUME), 0.0),
                       connected_to=self.mixer),  # black
-            PaintTank("white", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0, 0, 0, 0, TANK_VOLUME),
+            PaintTank("white", TANK_VOLUME, TANK_OUTFLOW, PaintMixture(0.0, 0.0, 0.0, 0.0, float(TANK_VOLUME)),
                       connected_to=self.mixer),  # white
             self.mixer  # mixing basin
         ]
+        # index the tanks by name for constant-time lookups
+        self._tanks_by_name = {tank.name: tank for tank in self.tanks}
+        # callbacks notified after each simulation step
+        self.listeners = []
+        # state of all tanks as published after the last change, see update_snapshot()
+        self.snapshot = ()
+        self.update_snapshot()
 
     def get_paint_tank_by_name(self, name):
         """
         Helper method to get a reference to the PaintTank instance with the given name.
         Returns None if not found.
         """
-        return next((tank for tank in self.tanks if tank.name == name), None)
+        return self._tanks_by_name.get(name)
+
+    def add_listener(self, callback):
+        """
+        Register a callback that is called without arguments whenever a new state is published, see publish().
+        """
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        """
+        Unregister a callback previously registered with add_listener().
+        """
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def get_tank_index(self, tank):
+        """
+        get the index of the given tank in the state snapshot
+        """
+        return self.tanks.index(tank)
+
+    def update_snapshot(self):
+        """
+        Publish the current state of all tanks as a tuple of PaintTank.get_state() tuples, indexed like self.tanks.
+        The snapshot is built under self.lock, so it never mixes tanks from before and after a step or a change made
+        by another thread, and it is replaced by a single assignment, so readers don't need the lock.
+        """
+        with self.lock:
+            self.snapshot = tuple(tank.get_state() for tank in self.tanks)
+
+    def step(self, interval: float):
+        """
+        advance all tanks by one time step without publishing the new state
+        """
+        with self.lock:
+            for tank in self.tanks:
+                tank.simulate_timestep(interval)
+
+            # increase simulation time
+            self.sim_time += interval
 
     def simulate(self, interval: float):
         """
         advance simulation for a simulated duration of the specified time interval
         """
-        for tank in self.tanks:
-            tank.simulate_timestep(interval)
+        self.step(interval)
+        self.publish()
+
+    def simulate_many(self, interval: float, n_steps: int):
+        """
+        advance simulation by n_steps time steps of the specified interval, the state is only published after the last one
+        """
+        for _ in range(n_steps):
+            self.step(interval)
+        self.publish()
+
+    def publish(self):
+        """
+        publish the current state and notify the listeners
+        """
+        self.update_snapshot()
 
-        # increase simulation time
-        self.sim_time += interval
+        # notify listeners about the new state, iterate over a copy as listeners may be (un)registered concurrently
+        for callback in list(self.listeners):
+            try:
+                callback()
+            except Exception:
+                # a failing listener (e.g. a device being initialized or deleted) must not stop the simulation
+                log.exception("Error in simulator listener %r", callback)
 
     def stop(self):
         """
@@ -256,9 +418,16 @@ class Simulator(Thread):
         main function for the simulation thread
         """
         interval = 1.0  # 1 second
+        # schedule the steps against a monotonic deadline, so the time spent in simulate() doesn't add up as drift
+        next_deadline = time.monotonic()
         while not self.stopRequested:
             self.simulate(interval=interval)
-            time.sleep(interval)
+            if not self.realtime:
+                continue
+            next_deadline += interval
+            delay = next_deadline - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
 
 
 if __name__ == "__main__":
@@ -272,7 +441,7 @@ if __name__ == "__main__":
     # run the simulation for the specified time step and print some information
     for i in range(10):
         simulator.simulate(1.0)
-        print("============================================")
-        for tank in simulator.tanks:
-            print("Name: %s Volume: %.2f/%.2f" % (tank.name, tank.paint.volume, tank.tank_volume),
-                  "paint: %s" % tank.paint)
+        # write the state of all tanks with a single print call
+        print("\n".join(["============================================"] +
+                        ["Name: %s Volume: %.2f/%.2f paint: %s" % (tank.name, tank.paint.volume, tank.tank_volume, tank.paint)
+                         for tank in simulator.tanks]))